@@ -7,15 +7,16 @@ import sys
 
 import click
 
-from graph_builder import build_graph, find_nearest_node
+from graph_builder import build_graph, find_nearest_node, haversine
 from history import WalkHistory
+from route_cache import RouteCache
 from router import shortest_path, novelty_route, path_to_edges, _edge_key, generate_instructions
 
 
 def _load_graph():
     """Load graph, building from PBF if needed."""
-    from graph_builder import DEFAULT_GRAPH, DEFAULT_PBF
-    if not os.path.exists(DEFAULT_GRAPH) and not os.path.exists(DEFAULT_PBF):
+    from graph_builder import DEFAULT_GRAPH, DEFAULT_PBF, _resolve_graph_path
+    if not os.path.exists(_resolve_graph_path(DEFAULT_GRAPH)) and not os.path.exists(DEFAULT_PBF):
         click.echo("Error: No graph or PBF data found. Run download_data.py first.", err=True)
         sys.exit(1)
     return build_graph()
@@ -43,7 +44,10 @@ def cli():
 @click.option("--max-overhead", default=0.25, type=float, help="Maximum overhead vs shortest path (0.0-1.0)")
 @click.option("--record/--no-record", default=False, help="Automatically record route as walked")
 @click.option("--output", "-o", type=click.Path(), help="Save route to JSON file")
-def route(from_, to, min_novelty, max_overhead, record, output):
+@click.option("--cache/--no-cache", default=True, help="Reuse routes cached by earlier runs")
+@click.option("--max-radius", type=float, default=None,
+              help="Search bound in meters (default: derived from crow-flies distance, 0 = unbounded)")
+def route(from_, to, min_novelty, max_overhead, record, output, cache, max_radius):
     """Find a novelty-weighted walking route between two points."""
     start_lat, start_lon = _parse_latlon(from_)
     end_lat, end_lon = _parse_latlon(to)
@@ -66,12 +70,30 @@ def route(from_, to, min_novelty, max_overhead, record, output):
     # Find route
     click.echo(f"\nRouting (min_novelty={min_novelty}, max_overhead={max_overhead})...")
 
+    # Bound the search to a generous multiple of the crow-flies distance;
+    # if nothing is found within it, retry unbounded below
+    if max_radius is None:
+        crow = haversine(start_lat, start_lon, end_lat, end_lon)
+        max_radius = (1 + max_overhead) * crow * 1.5
+    radius = max_radius or None
+
+    # Route through the persistent cache unless disabled
+    route_cache = RouteCache() if cache else None
+    find_novelty = route_cache.novelty_route if route_cache else novelty_route
+    find_shortest = route_cache.shortest_path if route_cache else shortest_path
+
     if walked:
-        result = novelty_route(G, src_node, tgt_node, walked,
-                               min_novelty=min_novelty, max_overhead=max_overhead)
+        result = find_novelty(G, src_node, tgt_node, walked,
+                              min_novelty=min_novelty, max_overhead=max_overhead,
+                              max_radius=radius)
+        if result is None and radius is not None:
+            result = find_novelty(G, src_node, tgt_node, walked,
+                                  min_novelty=min_novelty, max_overhead=max_overhead)
     else:
         # No history — just use shortest path
-        path, dist = shortest_path(G, src_node, tgt_node)
+        path, dist = find_shortest(G, src_node, tgt_node, max_radius=radius)
+        if path is None and radius is not None:
+            path, dist = find_shortest(G, src_node, tgt_node)
         if path:
             result = {
                 "path": path,
@@ -86,6 +108,9 @@ def route(from_, to, min_novelty, max_overhead, record, output):
         else:
             result = None
 
+    if route_cache:
+        route_cache.close()
+
     if result is None:
         click.echo("No route found!", err=True)
         history.close()
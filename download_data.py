@@ -1,14 +1,32 @@
 #!/usr/bin/env python3
 """Download San Francisco area OSM extract from Geofabrik."""
 
+import hashlib
 import os
 import sys
+import time
 import requests
 
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
 PBF_URL = "https://download.geofabrik.de/north-america/us/california/norcal-latest.osm.pbf"
 PBF_FILENAME = "norcal-latest.osm.pbf"
 
+CHUNK_SIZE = 1 << 20         # 1 MB per read
+WRITE_BUFFER = 16 << 20      # 16 MB file buffer
+PROGRESS_INTERVAL = 0.25     # seconds between progress updates
+
+
+def _expected_md5(url):
+    """Fetch the .md5 file Geofabrik publishes next to each extract, or None."""
+    try:
+        response = requests.get(url + ".md5", timeout=30)
+    except requests.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+    fields = response.text.split()
+    return fields[0].lower() if fields else None
+
 
 def download_pbf(url=PBF_URL, dest_dir=DATA_DIR, filename=PBF_FILENAME):
     """Download the PBF file if it doesn't already exist."""
@@ -27,16 +45,37 @@ def download_pbf(url=PBF_URL, dest_dir=DATA_DIR, filename=PBF_FILENAME):
 
     total_size = int(response.headers.get("content-length", 0))
     downloaded = 0
+    digest = hashlib.md5()
+    last_print = 0.0
 
-    with open(dest_path, "wb") as f:
-        for chunk in response.iter_content(chunk_size=8192):
+    # Download to a .part file so an interrupted run is never mistaken
+    # for a complete one
+    part_path = dest_path + ".part"
+    with open(part_path, "wb", buffering=WRITE_BUFFER) as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
             f.write(chunk)
+            digest.update(chunk)
             downloaded += len(chunk)
-            if total_size:
+            now = time.monotonic()
+            if total_size and (now - last_print >= PROGRESS_INTERVAL or downloaded == total_size):
+                last_print = now
                 pct = downloaded / total_size * 100
                 print(f"\r  {downloaded / 1e6:.1f} / {total_size / 1e6:.1f} MB ({pct:.1f}%)", end="", flush=True)
+    print()
+
+    expected = _expected_md5(url)
+    if expected is None:
+        print("  No checksum published; skipping verification")
+    elif digest.hexdigest() != expected:
+        os.remove(part_path)
+        sys.exit(f"Checksum mismatch for {url}: expected {expected}, got {digest.hexdigest()}")
+    else:
+        print("  Checksum OK")
 
-    print(f"\nSaved to {dest_path}")
+    os.replace(part_path, dest_path)
+    print(f"Saved to {dest_path}")
     return dest_path
 
 
@@ -2,32 +2,65 @@
 """Parse OSM PBF file and build a walkable graph in CSR format.
 
 The graph is stored as Compressed Sparse Row (CSR) numpy arrays in a
-gzip-compressed .npz file. On load, only a node_id→index dict is built
-(~1-2s for 3.5M nodes), avoiding the 13s NetworkX reconstruction.
+zstd-compressed stream of .npy records (legacy .npz files still load).
+Alongside it the same arrays are written to the flat binary format the
+Swift router reads (walk_graph.bin); Python loads memory-map that file
+and only page in the parts a query touches. Nodes are sorted by OSM ID, so on load OSM
+IDs are resolved by binary search over node_ids instead of building a
+node_id→index dict (~1-2s and ~200MB for 3.5M nodes).
 """
 
 import math
+import mmap
 import os
+import pickle
+import struct
+import tempfile
+from array import array
+from contextlib import contextmanager
+from itertools import chain
 
-import networkx as nx
 import numpy as np
 import osmium
+import osmium.filter
+import zstandard
 from scipy.spatial import KDTree
 
+from graph_builder_numba import dijkstra_all, edge_slots, refine_nearest
+
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
 DEFAULT_PBF = os.path.join(DATA_DIR, "norcal-latest.osm.pbf")
-DEFAULT_GRAPH = os.path.join(DATA_DIR, "walk_graph.npz")
+DEFAULT_GRAPH = os.path.join(DATA_DIR, "walk_graph.csr.zst")
+
+# Landmarks for the routers' ALT heuristic (float32 distances, so 4 bytes
+# per node each)
+LANDMARK_COUNT = 16
 
 # Highway types that are walkable
-WALKABLE_HIGHWAYS = {
+WALKABLE_HIGHWAYS = frozenset({
     "footway", "path", "pedestrian", "residential", "living_street",
     "tertiary", "secondary", "primary", "trunk", "steps", "cycleway",
     "unclassified", "service", "track", "tertiary_link", "secondary_link",
     "primary_link",
-}
+})
 
 # Highway types to always exclude
-EXCLUDED_HIGHWAYS = {"motorway", "motorway_link"}
+EXCLUDED_HIGHWAYS = frozenset({"motorway", "motorway_link"})
+
+# access/foot values that close or reopen a way to pedestrians
+_RESTRICTED_ACCESS = frozenset({"private", "no"})
+_FOOT_ALLOWED = frozenset({"yes", "designated", "permissive"})
+
+# Flat binary graph layout shared with the Swift router (see export_graph.py):
+# a 32-byte header, then these arrays back to back in order
+_BIN_MAGIC = b"CSRG"
+_BIN_HEADER_SIZE = 32
+_BIN_ARRAYS = [
+    ("node_ids", "<i8"), ("node_lats", "<f4"), ("node_lons", "<f4"),
+    ("adj_offsets", "<i4"), ("adj_targets", "<i4"), ("adj_weights", "<f4"),
+]
+# v2 additions, followed by the name and highway string tables
+_BIN_NAME_ARRAYS = [("edge_name_indices", "<u2"), ("edge_highway_indices", "u1")]
 
 # Bay Area bounding box
 BAY_AREA_BBOX = {
@@ -49,6 +82,17 @@ def haversine(lat1, lon1, lat2, lon2):
     return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
 
 
+def haversine_v(lat1, lon1, lat2, lon2):
+    """Vectorized haversine: element-wise distance in meters for NumPy arrays."""
+    R = 6371000.0  # Earth radius in meters
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    dphi = np.radians(lat2 - lat1)
+    dlam = np.radians(lon2 - lon1)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlam / 2) ** 2
+    return R * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
 def bearing(lat1, lon1, lat2, lon2):
     """Calculate initial bearing in degrees [0, 360) from point 1 to point 2."""
     phi1 = math.radians(lat1)
@@ -60,11 +104,23 @@ def bearing(lat1, lon1, lat2, lon2):
     return (degrees + 360) % 360
 
 
+def bearing_v(lat1, lon1, lat2, lon2):
+    """Vectorized bearing: element-wise initial bearing in degrees [0, 360)."""
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    dlam = np.radians(lon2 - lon1)
+    y = np.sin(dlam) * np.cos(phi2)
+    x = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(dlam)
+    degrees = np.degrees(np.arctan2(y, x))
+    return (degrees + 360) % 360
+
+
 class CompactGraph:
     """CSR-based graph representation using flat numpy arrays.
 
     Arrays:
-        node_ids[i]:      int64   — OSM ID for node at index i
+        node_ids[i]:      int64   — OSM ID for node at index i (ascending
+                                    when sorted_ids is True)
         node_lats[i]:     float32 — latitude
         node_lons[i]:     float32 — longitude
         adj_offsets[i]:   int32   — start of node i's neighbors in adj_targets
@@ -75,7 +131,8 @@ class CompactGraph:
     def __init__(self, node_ids, node_lats, node_lons,
                  adj_offsets, adj_targets, adj_weights,
                  edge_name_indices=None, edge_highway_indices=None,
-                 name_table=None, highway_table=None):
+                 name_table=None, highway_table=None, sorted_ids=True,
+                 graph_path=None, name_table_raw=None, highway_table_raw=None):
         self.node_ids = node_ids
         self.node_lats = node_lats
         self.node_lons = node_lons
@@ -84,14 +141,57 @@ class CompactGraph:
         self.adj_weights = adj_weights
         self.edge_name_indices = edge_name_indices
         self.edge_highway_indices = edge_highway_indices
-        self.name_table = name_table
-        self.highway_table = highway_table
-
-        # Build OSM ID → array index lookup
-        self.node_id_to_idx = {int(osm_id): i for i, osm_id in enumerate(node_ids)}
-
+        # String tables are either given decoded, or as raw newline-joined
+        # UTF-8 (uint8 arrays) that are only decoded on first use
+        self._name_table = name_table
+        self._highway_table = highway_table
+        self._name_table_raw = name_table_raw
+        self._highway_table_raw = highway_table_raw
+
+        # OSM ID → array index lookup. Sorted IDs (the _graph_to_compact
+        # layout) are binary-searched, so the dict is only needed otherwise.
+        self.sorted_ids = sorted_ids
+        if sorted_ids:
+            self.node_id_to_idx = None
+        else:
+            ids_list = node_ids.tolist()
+            self.node_id_to_idx = dict(zip(ids_list, range(len(ids_list))))
+
+        # Source file, if loaded from disk; lets the KDTree be cached beside it
+        self.graph_path = graph_path
+        self._node_coords = None
         self._kdtree = None
         self._kdtree_cos_lat = None
+        self._landmarks = None
+
+    @property
+    def node_coords(self):
+        """(N, 2) float32 array of [lat, lon] rows (built on first use).
+
+        Interleaved so a gather by node index reads both coordinates from
+        one cache line, rather than one from each of node_lats/node_lons.
+        """
+        if self._node_coords is None:
+            coords = np.empty((len(self.node_lats), 2), dtype=np.float32)
+            coords[:, 0] = self.node_lats
+            coords[:, 1] = self.node_lons
+            self._node_coords = coords
+        return self._node_coords
+
+    @property
+    def landmarks(self):
+        """(N, LANDMARK_COUNT) float32 distances in meters to each landmark.
+
+        Row v holds v's road distance to every landmark (inf where there
+        is no route), so by the triangle inequality
+        max_k |landmarks[t, k] - landmarks[v, k]| never overestimates the
+        distance from v to t. The router takes the larger of this and the
+        haversine bound. build_graph saves it beside the graph file and it
+        is memory-mapped from there on first use.
+        """
+        if self._landmarks is None:
+            self._build_landmarks()
+        return self._landmarks
 
     def neighbors(self, idx):
         """Return (target_indices, weights) slices for node at idx. Zero-copy."""
@@ -99,9 +199,14 @@ class CompactGraph:
         end = self.adj_offsets[idx + 1]
         return self.adj_targets[start:end], self.adj_weights[start:end]
 
-    def find_nearest_node(self, lat, lon):
+    def find_nearest_node(self, lat, lon, precise=False):
         """Find the nearest graph node to a lat/lon coordinate.
 
+        Over a bbox-sized area the equirectangular projection the KDTree
+        uses is accurate to well under a metre, so its top hit is taken
+        as-is. Pass precise=True to re-rank the 10 nearest candidates by
+        true haversine distance instead.
+
         Returns:
             (index, distance_in_meters)
         """
@@ -114,23 +219,79 @@ class CompactGraph:
             math.radians(lon) * 6371000 * cos_lat,
         ])
 
+        if not precise:
+            _, idx = self._kdtree.query(q, k=1)
+            idx = int(idx)
+            # Read the two scalars directly: node_coords would copy every
+            # coordinate and page in all of a memory-mapped graph
+            return idx, haversine(lat, lon, float(self.node_lats[idx]), float(self.node_lons[idx]))
+
         k = min(10, len(self.node_ids))
         _, idxs = self._kdtree.query(q, k=k)
+        idxs = np.atleast_1d(idxs)
+
+        # Re-rank the KDTree candidates by true haversine distance
+        pos, best_dist = refine_nearest(float(lat), float(lon),
+                                        self.node_coords[idxs].astype(np.float64))
+
+        return int(idxs[pos]), best_dist
 
-        best_idx = None
-        best_dist = float("inf")
-        for idx in idxs:
-            d = haversine(lat, lon,
-                          float(self.node_lats[idx]), float(self.node_lons[idx]))
-            if d < best_dist:
-                best_dist = d
-                best_idx = idx
+    def find_nearest_nodes_bulk(self, lats, lons):
+        """Nearest graph node for each of many coordinates, in one KDTree query.
 
-        return best_idx, best_dist
+        Picks the same node as find_nearest_node (without precise) for
+        each point.
+
+        Returns:
+            (indices, distances_in_meters) arrays
+        """
+        if self._kdtree is None:
+            self._build_kdtree()
+
+        cos_lat = self._kdtree_cos_lat
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        # Project exactly as find_nearest_node does: there a Python float
+        # times cos_lat (a NumPy scalar, float32 for a float32 graph) is
+        # computed in cos_lat's dtype, so the longitude term is cast to it
+        # here too and near-ties resolve to the same node
+        q = np.column_stack((
+            np.radians(lats) * 6371000,
+            (np.radians(lons) * 6371000).astype(np.result_type(cos_lat)) * cos_lat,
+        ))
+        _, idxs = self._kdtree.query(q, k=1)
+        idxs = idxs.astype(np.int64)
+        dists = haversine_v(lats, lons, self.node_lats[idxs].astype(np.float64),
+                            self.node_lons[idxs].astype(np.float64))
+        return idxs, dists
 
     def idx_for_osm_id(self, osm_id):
-        """Return array index for an OSM node ID."""
-        return self.node_id_to_idx[osm_id]
+        """Return array index for an OSM node ID. Raises KeyError if absent."""
+        if self.node_id_to_idx is not None:
+            return self.node_id_to_idx[osm_id]
+        i = self.idx_for_osm_id_searchsorted(osm_id)
+        if i < 0:
+            raise KeyError(osm_id)
+        return i
+
+    def idx_for_osm_id_searchsorted(self, osm_id):
+        """Binary-search sorted node_ids for an OSM ID. Returns -1 if absent."""
+        i = int(np.searchsorted(self.node_ids, osm_id))
+        if i < len(self.node_ids) and self.node_ids[i] == osm_id:
+            return i
+        return -1
+
+    def idx_for_osm_ids_bulk(self, osm_ids):
+        """Resolve an array of OSM IDs to indices in one pass (-1 where absent)."""
+        osm_ids = np.asarray(osm_ids, dtype=np.int64)
+        if self.node_id_to_idx is not None:
+            get = self.node_id_to_idx.get
+            return np.fromiter((get(i, -1) for i in osm_ids.tolist()),
+                               dtype=np.int64, count=len(osm_ids))
+        idxs = np.searchsorted(self.node_ids, osm_ids)
+        idxs[idxs == len(self.node_ids)] = 0
+        found = self.node_ids[idxs] == osm_ids if len(self.node_ids) else False
+        return np.where(found, idxs, -1).astype(np.int64)
 
     def number_of_nodes(self):
         return len(self.node_ids)
@@ -139,51 +300,142 @@ class CompactGraph:
         # Each undirected edge is stored twice in CSR
         return len(self.adj_targets) // 2
 
+    def _edge_slot(self, u_idx, v_idx):
+        """Return the CSR slot of edge u_idx→v_idx, or -1 if there is none.
+
+        Neighbours are sorted by target index, so this is a binary search.
+        """
+        start = self.adj_offsets[u_idx]
+        end = self.adj_offsets[u_idx + 1]
+        sub = self.adj_targets[start:end]
+        j = int(np.searchsorted(sub, v_idx))
+        if j < len(sub) and sub[j] == v_idx:
+            return int(start) + j
+        return -1
+
     def edge_name(self, u_idx, v_idx):
         """Return street name for edge u_idx→v_idx, or None if no name data."""
         if self.edge_name_indices is None or self.name_table is None:
             return None
-        start = self.adj_offsets[u_idx]
-        end = self.adj_offsets[u_idx + 1]
-        for j in range(start, end):
-            if self.adj_targets[j] == v_idx:
-                idx = int(self.edge_name_indices[j])
-                name = self.name_table[idx]
-                return name if name else None
-        return None
+        j = self._edge_slot(u_idx, v_idx)
+        if j < 0:
+            return None
+        name = self.name_table[int(self.edge_name_indices[j])]
+        return name if name else None
 
     def edge_highway(self, u_idx, v_idx):
         """Return highway type for edge u_idx→v_idx, or None if no data."""
         if self.edge_highway_indices is None or self.highway_table is None:
             return None
-        start = self.adj_offsets[u_idx]
-        end = self.adj_offsets[u_idx + 1]
-        for j in range(start, end):
-            if self.adj_targets[j] == v_idx:
-                idx = int(self.edge_highway_indices[j])
-                hw = self.highway_table[idx]
-                return hw if hw else None
-        return None
+        j = self._edge_slot(u_idx, v_idx)
+        if j < 0:
+            return None
+        hw = self.highway_table[int(self.edge_highway_indices[j])]
+        return hw if hw else None
+
+    def edge_slots_bulk(self, u_arr, v_arr):
+        """Return CSR slots for edges u_arr[i]→v_arr[i] (-1 where missing)."""
+        return edge_slots(self.adj_offsets, self.adj_targets,
+                          np.asarray(u_arr, dtype=np.int64),
+                          np.asarray(v_arr, dtype=np.int64))
+
+    def edge_names_bulk(self, u_arr, v_arr):
+        """Vectorized edge_name over parallel index arrays. Returns a list."""
+        if self.edge_name_indices is None or self.name_table is None:
+            return [None] * len(u_arr)
+        return self._lookup_bulk(self.edge_slots_bulk(u_arr, v_arr),
+                                 self.edge_name_indices, self.name_table)
+
+    def edge_highways_bulk(self, u_arr, v_arr):
+        """Vectorized edge_highway over parallel index arrays. Returns a list."""
+        if self.edge_highway_indices is None or self.highway_table is None:
+            return [None] * len(u_arr)
+        return self._lookup_bulk(self.edge_slots_bulk(u_arr, v_arr),
+                                 self.edge_highway_indices, self.highway_table)
+
+    @staticmethod
+    def _lookup_bulk(slots, table_indices, table):
+        """Map CSR slots to strings from table, with None for missing/empty."""
+        found = slots >= 0
+        idxs = np.zeros(len(slots), dtype=np.int64)
+        idxs[found] = table_indices[slots[found]]
+        return [(table[i] or None) if ok else None
+                for i, ok in zip(idxs.tolist(), found.tolist())]
+
+    @property
+    def name_table(self):
+        """Street names by index (lazily decoded)."""
+        if self._name_table is None and self._name_table_raw is not None:
+            self._name_table = _decode_string_table(self._name_table_raw)
+        return self._name_table
+
+    @property
+    def highway_table(self):
+        """Highway types by index (lazily decoded)."""
+        if self._highway_table is None and self._highway_table_raw is not None:
+            self._highway_table = _decode_string_table(self._highway_table_raw)
+        return self._highway_table
 
     def has_name_data(self):
         """Return True if name/highway data is available."""
-        return self.edge_name_indices is not None and self.name_table is not None
+        return self.edge_name_indices is not None and (
+            self._name_table is not None or self._name_table_raw is not None)
 
     def _build_kdtree(self):
-        """Build KDTree lazily on first nearest-node call."""
-        lats = self.node_lats
-        lons = self.node_lons
-        mean_lat = np.radians(np.mean(lats))
+        """Build KDTree lazily on first nearest-node call.
+
+        When the graph came from a file, the tree is pickled next to it and
+        reused by later processes until the graph file is rewritten.
+        """
+        kdtree_path = _kdtree_path(self.graph_path) if self.graph_path else None
+        if kdtree_path and _is_fresh(kdtree_path, self.graph_path):
+            try:
+                with open(kdtree_path, "rb") as f:
+                    self._kdtree, self._kdtree_cos_lat = pickle.load(f)
+                return
+            except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+                pass  # Corrupt or incompatible cache; rebuild below
+
+        mean_lat = np.radians(np.mean(self.node_lats))
         cos_lat = np.cos(mean_lat)
 
-        coords = np.column_stack([
-            np.radians(lats) * 6371000,
-            np.radians(lons) * 6371000 * cos_lat,
-        ])
+        # Project the interleaved [lat, lon] rows in place of one fresh copy
+        coords = np.radians(self.node_coords)
+        coords *= 6371000
+        coords[:, 1] *= cos_lat
 
         self._kdtree = KDTree(coords)
         self._kdtree_cos_lat = cos_lat
 
+        if kdtree_path:
+            try:
+                with _replacing(kdtree_path) as f:
+                    pickle.dump((self._kdtree, cos_lat), f, protocol=5)
+            except OSError:
+                pass  # The tree is built; only later processes miss the cache
+
+    def _build_landmarks(self):
+        """Load the landmark table saved beside the graph file.
+
+        build_graph writes it with the graph. For a graph cached before
+        that, or one not loaded from a file, it is computed here instead
+        and saved if possible.
+        """
+        landmarks_path = _landmarks_path(self.graph_path) if self.graph_path else None
+        if landmarks_path and _is_fresh(landmarks_path, self.graph_path):
+            try:
+                self._landmarks = np.load(landmarks_path, mmap_mode="r")
+                return
+            except (OSError, ValueError):
+                pass  # Corrupt or incompatible cache; rebuild below
+
+        self._landmarks = _compute_landmarks(self.adj_offsets, self.adj_targets, self.adj_weights)
+        if landmarks_path:
+            try:
+                _save_landmarks(self._landmarks, landmarks_path)
+            except OSError:
+                pass  # Computed for this process; later ones will retry
+
 
 class WayCollector(osmium.SimpleHandler):
     """First pass: collect walkable ways and their node references."""
@@ -195,9 +447,9 @@ class WayCollector(osmium.SimpleHandler):
         self.bbox = bbox
 
     def way(self, w):
-        tags = {t.k: t.v for t in w.tags}
-        highway = tags.get("highway")
-
+        # Most ways (buildings, landuse, ...) have no highway tag, so reject
+        # them with osmium's lookup before touching the rest of the tags
+        highway = w.tags.get("highway")
         if not highway:
             return
         if highway in EXCLUDED_HIGHWAYS:
@@ -205,117 +457,128 @@ class WayCollector(osmium.SimpleHandler):
         if highway not in WALKABLE_HIGHWAYS:
             return
 
+        # Single pass over the tags for the three others we need
+        access = foot = name = ""
+        for t in w.tags:
+            k = t.k
+            if k == "access":
+                access = t.v
+            elif k == "foot":
+                foot = t.v
+            elif k == "name":
+                name = t.v
+
         # Exclude private access or foot=no
-        access = tags.get("access", "")
-        foot = tags.get("foot", "")
-        if access in ("private", "no") and foot not in ("yes", "designated", "permissive"):
+        if access in _RESTRICTED_ACCESS and foot not in _FOOT_ALLOWED:
             return
         if foot == "no":
             return
 
         node_ids = [n.ref for n in w.nodes]
-        self.ways.append((node_ids, tags.get("name", ""), highway))
+        self.ways.append((node_ids, name, highway))
         self.needed_nodes.update(node_ids)
 
 
 class NodeCollector(osmium.SimpleHandler):
-    """Second pass: collect coordinates for needed nodes."""
+    """Second pass: collect coordinates for needed nodes.
+
+    The needed-ID test runs inside osmium (see apply_file), so node() only
+    sees nodes we want. Coordinates go into flat typed arrays rather than
+    a dict of tuples; the bbox is applied to them in bulk by arrays().
+    """
 
     def __init__(self, needed_nodes, bbox=None):
         super().__init__()
         self.needed_nodes = needed_nodes
-        self.node_coords = {}
         self.bbox = bbox
+        self._ids = array("q")
+        self._lats = array("d")
+        self._lons = array("d")
+
+    def apply_file(self, filename, **kwargs):
+        filters = [osmium.filter.EntityFilter(osmium.osm.NODE),
+                   osmium.filter.IdFilter(self.needed_nodes)]
+        super().apply_file(filename, filters=filters, **kwargs)
 
     def node(self, n):
-        if n.id in self.needed_nodes:
-            lat, lon = n.location.lat, n.location.lon
-            if self.bbox:
-                if not (self.bbox["min_lat"] <= lat <= self.bbox["max_lat"] and
-                        self.bbox["min_lon"] <= lon <= self.bbox["max_lon"]):
-                    return
-            self.node_coords[n.id] = (lat, lon)
+        loc = n.location
+        self._ids.append(n.id)
+        self._lats.append(loc.lat)
+        self._lons.append(loc.lon)
+
+    def arrays(self):
+        """Return (ids, lats, lons) sorted by ID, restricted to the bbox."""
+        ids = np.frombuffer(self._ids, dtype=np.int64)
+        lats = np.frombuffer(self._lats, dtype=np.float64)
+        lons = np.frombuffer(self._lons, dtype=np.float64)
+        if self.bbox:
+            inside = ((lats >= self.bbox["min_lat"]) & (lats <= self.bbox["max_lat"]) &
+                      (lons >= self.bbox["min_lon"]) & (lons <= self.bbox["max_lon"]))
+            ids, lats, lons = ids[inside], lats[inside], lons[inside]
+        order = np.argsort(ids, kind="stable")
+        return ids[order], lats[order], lons[order]
+
+
+def _string_table(codes, values):
+    """Compact per-edge codes into a sorted string table with "" at index 0.
+
+    codes index into values, which may repeat strings or hold ones no edge
+    uses (e.g. one entry per way). Returns (table, indices into table).
+    """
+    used, inverse = np.unique(codes, return_inverse=True)
+    strings = np.array([values[i] for i in used.tolist()] + [""], dtype=object)
+    # Only distinct used strings are sorted here, not one per edge; ""
+    # sorts first, so it is index 0 whether or not any edge uses it
+    table, remap = np.unique(strings, return_inverse=True)
+    return table.tolist(), remap[:-1][inverse]
 
 
-def _graph_to_compact(G):
-    """Convert a NetworkX graph to CSR numpy arrays.
+def _graph_to_compact(node_ids, node_lats, node_lons, edge_u, edge_v, edge_w,
+                      edge_name_codes, name_values, edge_highway_codes, highway_values):
+    """Convert an undirected edge list to CSR numpy arrays.
+
+    Args:
+        node_ids: int64 array of OSM IDs, sorted ascending
+        node_lats, node_lons: Coordinates parallel to node_ids
+        edge_u, edge_v: Endpoint indices into node_ids, one per undirected edge
+        edge_w: Edge lengths in meters
+        edge_name_codes, name_values: Per-edge index into name_values, the
+            candidate street names ("" if none)
+        edge_highway_codes, highway_values: Same for highway types
 
     Each undirected edge is stored twice (once per direction).
-    Nodes are sorted by OSM ID for deterministic indexing.
     """
-    # Sort nodes by OSM ID for deterministic ordering
-    nodes = sorted(G.nodes(data=True), key=lambda n: n[0])
-    num_nodes = len(nodes)
+    node_ids = np.asarray(node_ids, dtype=np.int64)
+    node_lats = np.asarray(node_lats, dtype=np.float32)
+    node_lons = np.asarray(node_lons, dtype=np.float32)
+    num_nodes = len(node_ids)
 
-    node_ids = np.array([n[0] for n in nodes], dtype=np.int64)
-    node_lats = np.array([n[1]["lat"] for n in nodes], dtype=np.float32)
-    node_lons = np.array([n[1]["lon"] for n in nodes], dtype=np.float32)
+    # Build string tables for names and highway types
+    name_list, name_idx = _string_table(edge_name_codes, name_values)
+    highway_list, highway_idx = _string_table(edge_highway_codes, highway_values)
 
-    # Build OSM ID → index mapping
-    osm_to_idx = {int(osm_id): i for i, osm_id in enumerate(node_ids)}
+    u_arr = np.asarray(edge_u, dtype=np.int32)
+    v_arr = np.asarray(edge_v, dtype=np.int32)
+    w_arr = np.asarray(edge_w, dtype=np.float32)
+    name_arr = name_idx.astype(np.uint16)
+    highway_arr = highway_idx.astype(np.uint8)
 
-    # Build string tables for names and highway types
-    name_set = {""}  # empty string always index 0
-    highway_set = {""}
-    for u, v, data in G.edges(data=True):
-        name_set.add(data.get("name", ""))
-        highway_set.add(data.get("highway", ""))
-
-    # Sort for determinism, but keep "" at index 0
-    name_list = [""] + sorted(name_set - {""})
-    highway_list = [""] + sorted(highway_set - {""})
-    name_to_idx = {s: i for i, s in enumerate(name_list)}
-    highway_to_idx = {s: i for i, s in enumerate(highway_list)}
-
-    # Count degrees (each undirected edge contributes 1 to each endpoint)
-    degrees = np.zeros(num_nodes, dtype=np.int32)
-    for u, v, data in G.edges(data=True):
-        u_idx = osm_to_idx[u]
-        v_idx = osm_to_idx[v]
-        degrees[u_idx] += 1
-        degrees[v_idx] += 1
-
-    # Compute prefix-sum offsets
+    # Each undirected edge becomes two directed slots: u→v and v→u
+    sources = np.concatenate([u_arr, v_arr])
+
+    # Prefix-sum offsets from per-node degrees
+    degrees = np.bincount(sources, minlength=num_nodes)
     adj_offsets = np.zeros(num_nodes + 1, dtype=np.int32)
     adj_offsets[1:] = np.cumsum(degrees)
-    num_directed_edges = int(adj_offsets[-1])
-
-    adj_targets = np.empty(num_directed_edges, dtype=np.int32)
-    adj_weights = np.empty(num_directed_edges, dtype=np.float32)
-    edge_name_indices = np.empty(num_directed_edges, dtype=np.uint16)
-    edge_highway_indices = np.empty(num_directed_edges, dtype=np.uint8)
-
-    # Fill adjacency lists using a write cursor per node
-    cursor = adj_offsets[:-1].copy()
-    for u, v, data in G.edges(data=True):
-        u_idx = osm_to_idx[u]
-        v_idx = osm_to_idx[v]
-        w = data["weight"]
-        ni = name_to_idx[data.get("name", "")]
-        hi = highway_to_idx[data.get("highway", "")]
-
-        adj_targets[cursor[u_idx]] = v_idx
-        adj_weights[cursor[u_idx]] = w
-        edge_name_indices[cursor[u_idx]] = ni
-        edge_highway_indices[cursor[u_idx]] = hi
-        cursor[u_idx] += 1
-
-        adj_targets[cursor[v_idx]] = u_idx
-        adj_weights[cursor[v_idx]] = w
-        edge_name_indices[cursor[v_idx]] = ni
-        edge_highway_indices[cursor[v_idx]] = hi
-        cursor[v_idx] += 1
-
-    # Sort each node's neighbors by target index for determinism
-    for i in range(num_nodes):
-        start = adj_offsets[i]
-        end = adj_offsets[i + 1]
-        if end - start > 1:
-            order = np.argsort(adj_targets[start:end])
-            adj_targets[start:end] = adj_targets[start:end][order]
-            adj_weights[start:end] = adj_weights[start:end][order]
-            edge_name_indices[start:end] = edge_name_indices[start:end][order]
-            edge_highway_indices[start:end] = edge_highway_indices[start:end][order]
+
+    # Sort directed slots by (source, target) in one pass; lexsort's last
+    # key is primary, so each node's neighbours come out grouped and sorted
+    targets = np.concatenate([v_arr, u_arr])
+    perm = np.lexsort((targets, sources))
+    adj_targets = targets[perm]
+    adj_weights = np.concatenate([w_arr, w_arr])[perm]
+    edge_name_indices = np.concatenate([name_arr, name_arr])[perm]
+    edge_highway_indices = np.concatenate([highway_arr, highway_arr])[perm]
 
     # Encode string tables as newline-joined bytes
     name_table = "\n".join(name_list).encode("utf-8")
@@ -335,31 +598,253 @@ def _graph_to_compact(G):
     }
 
 
-def _save_graph(G, graph_path):
-    """Save graph in CSR compressed numpy format."""
-    print("  Converting to CSR format...")
-    data = _graph_to_compact(G)
+def _compute_landmarks(adj_offsets, adj_targets, adj_weights):
+    """Pick landmarks by farthest-point selection; returns the landmarks table.
+
+    Each landmark is the node farthest (by road) from all those already
+    chosen, which spreads them around the edge of the graph where they
+    give the tightest bounds. One Dijkstra per landmark.
+    """
+    n = len(adj_offsets) - 1
+    k = min(LANDMARK_COUNT, n)
+    dists = np.empty((n, k), dtype=np.float32)
+    nearest = np.full(n, np.inf)
+    landmark = 0
+    for i in range(k):
+        d = dijkstra_all(adj_offsets, adj_targets, adj_weights, landmark)
+        dists[:, i] = d
+        np.minimum(nearest, d, out=nearest)
+        # Unreachable nodes rank below every reachable one
+        landmark = int(np.argmax(np.where(np.isfinite(nearest), nearest, -1.0)))
+    return dists
+
+
+def _save_landmarks(dists, landmarks_path):
+    """Write a landmark table as .npy (loaded memory-mapped)."""
+    with _replacing(landmarks_path) as f:
+        np.save(f, dists)
+
+
+def _save_graph(data, graph_path):
+    """Save CSR arrays (as returned by _graph_to_compact) zstd-compressed.
+
+    Layout: one .npy record holding the array names, then one .npy record
+    per array in that order, all inside a single multi-threaded zstd frame.
+    The flat .bin beside it (see _save_graph_bin) and the routers'
+    landmark table are written too, so no query has to build them.
+    """
     print(f"  Saving compressed to {graph_path}...")
-    np.savez_compressed(graph_path, **data)
+    cctx = zstandard.ZstdCompressor(level=3, threads=-1)
+    with open(graph_path, "wb") as f, cctx.stream_writer(f) as writer:
+        np.lib.format.write_array(writer, np.array(list(data)), allow_pickle=False)
+        for arr in data.values():
+            np.lib.format.write_array(writer, np.ascontiguousarray(arr), allow_pickle=False)
+
+    _save_graph_bin(data, _bin_path(graph_path))
+
+    print(f"  Computing {LANDMARK_COUNT} routing landmarks...")
+    _save_landmarks(_compute_landmarks(data["adj_offsets"], data["adj_targets"],
+                                       data["adj_weights"]),
+                    _landmarks_path(graph_path))
+
+
+def _load_arrays(graph_path):
+    """Load the raw CSR array dict from a .csr.zst (or legacy .npz) graph file."""
+    if graph_path.endswith(".npz"):
+        with np.load(graph_path) as npz:
+            return {name: npz[name] for name in npz.files}
+
+    dctx = zstandard.ZstdDecompressor()
+    with open(graph_path, "rb") as f, dctx.stream_reader(f) as reader:
+        names = np.lib.format.read_array(reader, allow_pickle=False)
+        return {str(name): np.lib.format.read_array(reader, allow_pickle=False)
+                for name in names}
+
+
+def _graph_stem(graph_path):
+    """graph_path without its .csr.zst/.npz extension, e.g. data/walk_graph."""
+    for ext in (".csr.zst", ".npz"):
+        if graph_path.endswith(ext):
+            return graph_path[:-len(ext)]
+    return graph_path
+
+
+def _bin_path(graph_path):
+    """Flat binary graph beside graph_path, e.g. data/walk_graph.bin."""
+    return _graph_stem(graph_path) + ".bin"
+
+
+def _pack_string_table(table_bytes):
+    """Newline-joined UTF-8 table → u32 count, then per string: u16 length + bytes."""
+    strings = table_bytes.tobytes().split(b"\n")
+    buf = bytearray(4 + sum(2 + len(s) for s in strings))
+    struct.pack_into("<I", buf, 0, len(strings))
+    pos = 4
+    for s in strings:
+        struct.pack_into("<H", buf, pos, len(s))
+        buf[pos + 2:pos + 2 + len(s)] = s
+        pos += 2 + len(s)
+    return buf
+
+
+def _unpack_string_table(buf, pos):
+    """Inverse of _pack_string_table. Returns (newline-joined uint8 array, end pos).
+
+    Only the byte layout is converted; decoding to str is left to
+    CompactGraph, which does it lazily.
+    """
+    (count,) = struct.unpack_from("<I", buf, pos)
+    pos += 4
+    strings = []
+    for _ in range(count):
+        (length,) = struct.unpack_from("<H", buf, pos)
+        strings.append(bytes(buf[pos + 2:pos + 2 + length]))
+        pos += 2 + length
+    return np.frombuffer(b"\n".join(strings), dtype=np.uint8), pos
+
+
+def _save_graph_bin(data, bin_path):
+    """Write CSR arrays in the flat binary format documented in export_graph.py.
+
+    The same file serves the Swift router and Python's own loads, which
+    map it with _load_graph_bin instead of decompressing anything.
+    """
+    # copy=False: arrays already in the target dtype are written as-is
+    arrays = [data[name].astype(dtype, copy=False) for name, dtype in _BIN_ARRAYS]
+    has_names = "edge_name_indices" in data
+    if has_names:
+        arrays += [data[name].astype(dtype, copy=False) for name, dtype in _BIN_NAME_ARRAYS]
+    version = 2 if has_names else 1
+
+    with _replacing(bin_path) as f:
+        # Header: magic, version, num_nodes, num_directed_edges, reserved
+        f.write(_BIN_MAGIC)
+        f.write(struct.pack("<III", version, len(data["node_ids"]), len(data["adj_targets"])))
+        f.write(b"\x00" * 16)
+
+        # Arrays are streamed straight to the file with tofile() rather
+        # than via an intermediate tobytes() copy
+        for arr in arrays:
+            arr.tofile(f)
+
+        if has_names:
+            f.write(_pack_string_table(data["name_table"]))
+            f.write(_pack_string_table(data["highway_table"]))
+    return version
+
+
+def _load_graph_bin(bin_path):
+    """Memory-map a flat binary graph. Returns the same dict as _load_arrays.
+
+    Every array is a read-only np.frombuffer view into the map, so nothing
+    is copied or decompressed and only the pages a query touches are read.
+    """
+    with open(bin_path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[:4] != _BIN_MAGIC:
+        raise ValueError(f"{bin_path} is not a CSR graph file")
+    version, num_nodes, num_edges = struct.unpack_from("<III", mm, 4)
+
+    counts = {"node_ids": num_nodes, "node_lats": num_nodes, "node_lons": num_nodes,
+              "adj_offsets": num_nodes + 1}
+    layout = list(_BIN_ARRAYS)
+    if version >= 2:
+        layout += _BIN_NAME_ARRAYS
+
+    data = {}
+    pos = _BIN_HEADER_SIZE
+    for name, dtype in layout:
+        arr = np.frombuffer(mm, dtype=dtype, count=counts.get(name, num_edges), offset=pos)
+        data[name] = arr
+        pos += arr.nbytes
+
+    if version >= 2:
+        data["name_table"], pos = _unpack_string_table(mm, pos)
+        data["highway_table"], pos = _unpack_string_table(mm, pos)
+    return data
+
+
+def _decode_string_table(raw):
+    """Decode a newline-joined UTF-8 string table (uint8 array) to a list."""
+    return raw.tobytes().decode("utf-8").split("\n")
+
+
+def _kdtree_path(graph_path):
+    """Pickled KDTree cache for graph_path, e.g. data/walk_graph.kdtree.pkl."""
+    return _graph_stem(graph_path) + ".kdtree.pkl"
+
+
+def _landmarks_path(graph_path):
+    """Landmark distance cache for graph_path, e.g. data/walk_graph.landmarks.npy."""
+    return _graph_stem(graph_path) + ".landmarks.npy"
+
+
+@contextmanager
+def _replacing(path):
+    """Open a unique temp file beside path; move it over path on success.
+
+    A fixed temp name would let two processes writing the same file at
+    once rename each other's output away. With a temp file per writer
+    each rename installs a complete file and the last one wins. On error
+    the temp file is removed and path is left as it was.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".",
+                                    prefix=os.path.basename(path) + ".")
+    try:
+        # mkstemp creates the file private to this user; caches are shared
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "wb") as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _is_fresh(cache_path, graph_path):
+    """True if cache_path exists and is no older than graph_path."""
+    if not os.path.exists(cache_path) or not os.path.exists(graph_path):
+        return False
+    return os.path.getmtime(cache_path) >= os.path.getmtime(graph_path)
+
+
+def _resolve_graph_path(graph_path):
+    """Return graph_path, or the legacy .npz beside it if only that exists."""
+    if not os.path.exists(graph_path) and graph_path.endswith(".csr.zst"):
+        legacy = graph_path[:-len(".csr.zst")] + ".npz"
+        if os.path.exists(legacy):
+            return legacy
+    return graph_path
 
 
 def _load_graph(graph_path):
-    """Load graph from CSR compressed numpy format. Returns CompactGraph."""
-    data = np.load(graph_path)
+    """Load graph from a CSR graph file. Returns CompactGraph.
+
+    Prefers the memory-mapped .bin beside graph_path. If it is missing or
+    stale, the compressed file is decoded and the .bin rewritten so the
+    next load can be mapped. If it can't be written (e.g. a read-only data
+    directory), the decoded arrays are used as they are.
+    """
+    bin_path = _bin_path(graph_path)
+    if _is_fresh(bin_path, graph_path):
+        data = _load_graph_bin(bin_path)
+    else:
+        data = _load_arrays(graph_path)
+        try:
+            _save_graph_bin(data, bin_path)
+        except OSError:
+            pass  # Still loadable from the decoded arrays; try again next load
 
     # Load name/highway data if present (graceful fallback for old .npz files)
     edge_name_indices = data["edge_name_indices"] if "edge_name_indices" in data else None
     edge_highway_indices = data["edge_highway_indices"] if "edge_highway_indices" in data else None
 
-    if "name_table" in data:
-        name_table = data["name_table"].tobytes().decode("utf-8").split("\n")
-    else:
-        name_table = None
-
-    if "highway_table" in data:
-        highway_table = data["highway_table"].tobytes().decode("utf-8").split("\n")
-    else:
-        highway_table = None
+    # String tables stay as raw bytes; CompactGraph decodes them on first use
+    name_table_raw = data["name_table"] if "name_table" in data else None
+    highway_table_raw = data["highway_table"] if "highway_table" in data else None
 
     return CompactGraph(
         node_ids=data["node_ids"],
@@ -370,8 +855,9 @@ def _load_graph(graph_path):
         adj_weights=data["adj_weights"],
         edge_name_indices=edge_name_indices,
         edge_highway_indices=edge_highway_indices,
-        name_table=name_table,
-        highway_table=highway_table,
+        name_table_raw=name_table_raw,
+        highway_table_raw=highway_table_raw,
+        graph_path=graph_path,
     )
 
 
@@ -386,9 +872,10 @@ def build_graph(pbf_path=DEFAULT_PBF, bbox=BAY_AREA_BBOX, graph_path=DEFAULT_GRA
     Returns:
         CompactGraph
     """
-    if os.path.exists(graph_path):
-        print(f"Loading cached graph from {graph_path}")
-        G = _load_graph(graph_path)
+    cached_path = _resolve_graph_path(graph_path)
+    if os.path.exists(cached_path):
+        print(f"Loading cached graph from {cached_path}")
+        G = _load_graph(cached_path)
         print(f"  {G.number_of_nodes()} nodes, {G.number_of_edges()} edges")
         return G
 
@@ -399,53 +886,77 @@ def build_graph(pbf_path=DEFAULT_PBF, bbox=BAY_AREA_BBOX, graph_path=DEFAULT_GRA
 
     print("Collecting node coordinates...")
     node_collector = NodeCollector(way_collector.needed_nodes, bbox=bbox)
-    node_collector.apply_file(pbf_path, locations=True)
-    print(f"  Found {len(node_collector.node_coords)} nodes within bounding box")
+    node_collector.apply_file(pbf_path)
+    coord_ids, coord_lats, coord_lons = node_collector.arrays()
+    print(f"  Found {len(coord_ids)} nodes within bounding box")
 
     print("Building graph...")
-    nx_graph = nx.Graph()
-    coords = node_collector.node_coords
-
-    for node_ids, way_name, way_highway in way_collector.ways:
-        for i in range(len(node_ids) - 1):
-            n1, n2 = node_ids[i], node_ids[i + 1]
-            if n1 in coords and n2 in coords:
-                lat1, lon1 = coords[n1]
-                lat2, lon2 = coords[n2]
-                dist = haversine(lat1, lon1, lat2, lon2)
-
-                if not nx_graph.has_node(n1):
-                    nx_graph.add_node(n1, lat=lat1, lon=lon1)
-                if not nx_graph.has_node(n2):
-                    nx_graph.add_node(n2, lat=lat2, lon=lon2)
-
-                # Use shorter distance if edge already exists (parallel ways)
-                if nx_graph.has_edge(n1, n2):
-                    if dist < nx_graph[n1][n2]["weight"]:
-                        nx_graph[n1][n2]["weight"] = dist
-                        nx_graph[n1][n2]["name"] = way_name
-                        nx_graph[n1][n2]["highway"] = way_highway
-                else:
-                    nx_graph.add_edge(n1, n2, weight=dist,
-                                      name=way_name, highway=way_highway)
-
-    print(f"  Graph: {nx_graph.number_of_nodes()} nodes, {nx_graph.number_of_edges()} edges")
+    ways = way_collector.ways
+
+    # Flatten all way node refs and resolve each against the sorted
+    # coordinate IDs; a ref is missing if it fell outside the bbox
+    way_lens = np.fromiter((len(w[0]) for w in ways), dtype=np.int64, count=len(ways))
+    refs = np.fromiter(chain.from_iterable(w[0] for w in ways), dtype=np.int64,
+                       count=int(way_lens.sum()))
+    ref_way = np.repeat(np.arange(len(ways), dtype=np.int64), way_lens)
+    ref_pos = np.searchsorted(coord_ids, refs)
+    ref_pos[ref_pos == len(coord_ids)] = 0
+    ref_found = coord_ids[ref_pos] == refs if len(coord_ids) else np.zeros(len(refs), dtype=bool)
+
+    # Every consecutive node pair within a way with both ends in the bbox
+    pair = (ref_way[1:] == ref_way[:-1]) & ref_found[1:] & ref_found[:-1]
+    pair_idx = np.flatnonzero(pair)
+    n1_arr = refs[pair_idx]
+    n2_arr = refs[pair_idx + 1]
+    way_arr = ref_way[pair_idx]
+    p1 = ref_pos[pair_idx]
+    p2 = ref_pos[pair_idx + 1]
+
+    # Compute all segment lengths in a single vectorized call
+    dists = haversine_v(coord_lats[p1], coord_lons[p1], coord_lats[p2], coord_lons[p2])
+
+    # Deduplicate parallel ways: keep the shortest segment per undirected
+    # node pair (the first one seen on ties, since lexsort is stable)
+    lo = np.minimum(n1_arr, n2_arr)
+    hi = np.maximum(n1_arr, n2_arr)
+    order = np.lexsort((dists, hi, lo))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (lo[order][1:] != lo[order][:-1]) | (hi[order][1:] != hi[order][:-1])
+    keep = order[first]
+
+    # Nodes are the sorted unique endpoints; resolve edges to indices in bulk
+    node_ids = np.unique(np.concatenate([lo[keep], hi[keep]]))
+    coord_pos = np.searchsorted(coord_ids, node_ids)
+    edge_u = np.searchsorted(node_ids, lo[keep])
+    edge_v = np.searchsorted(node_ids, hi[keep])
+
+    # Names and highway types are per way; edges just point at their way
+    edge_way = way_arr[keep]
+    way_names = [w[1] for w in ways]
+    way_highways = [w[2] for w in ways]
+
+    print(f"  Graph: {len(node_ids)} nodes, {len(keep)} edges")
+
+    print("  Converting to CSR format...")
+    data = _graph_to_compact(node_ids, coord_lats[coord_pos], coord_lons[coord_pos],
+                             edge_u, edge_v, dists[keep],
+                             edge_way, way_names, edge_way, way_highways)
 
     os.makedirs(os.path.dirname(graph_path), exist_ok=True)
-    _save_graph(nx_graph, graph_path)
+    _save_graph(data, graph_path)
 
     # Return as CompactGraph
     return _load_graph(graph_path)
 
 
 # Backwards-compatible module-level function
-def find_nearest_node(G, lat, lon):
+def find_nearest_node(G, lat, lon, precise=False):
     """Find the nearest graph node to a lat/lon coordinate.
 
     Returns:
         (osm_id, distance_in_meters)
     """
-    idx, dist = G.find_nearest_node(lat, lon)
+    idx, dist = G.find_nearest_node(lat, lon, precise=precise)
     return int(G.node_ids[idx]), dist
 
 
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Numba-compiled kernels used by graph_builder.
+
+Kept in a separate module so the JIT cache (cache=True writes next to
+this file in __pycache__) is only invalidated when a kernel changes.
+"""
+
+import heapq
+import math
+
+import numpy as np
+from numba import njit
+
+EARTH_RADIUS_M = 6371000.0
+
+
+@njit(cache=True, fastmath=True)
+def refine_nearest(qlat, qlon, coords):
+    """Pick the candidate closest to (qlat, qlon) by haversine distance.
+
+    Args:
+        qlat, qlon: Query point in degrees
+        coords: (k, 2) array of candidate [lat, lon] rows in degrees
+
+    Returns:
+        (position_in_candidates, distance_in_meters)
+    """
+    phi1 = math.radians(qlat)
+    cos_phi1 = math.cos(phi1)
+    best_pos = -1
+    best_dist = math.inf
+    for i in range(coords.shape[0]):
+        phi2 = math.radians(coords[i, 0])
+        dphi = phi2 - phi1
+        dlam = math.radians(coords[i, 1] - qlon)
+        a = math.sin(dphi / 2) ** 2 + cos_phi1 * math.cos(phi2) * math.sin(dlam / 2) ** 2
+        d = EARTH_RADIUS_M * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+        if d < best_dist:
+            best_dist = d
+            best_pos = i
+    return best_pos, best_dist
+
+
+@njit(cache=True)
+def edge_slots(adj_offsets, adj_targets, u_arr, v_arr):
+    """Find the CSR slot of each directed edge u_arr[i]→v_arr[i].
+
+    Relies on each node's neighbours being sorted by target index, as
+    written by _graph_to_compact. Missing edges get slot -1.
+    """
+    n = u_arr.shape[0]
+    slots = np.full(n, -1, dtype=np.int64)
+    for i in range(n):
+        v = v_arr[i]
+        lo = adj_offsets[u_arr[i]]
+        hi = adj_offsets[u_arr[i] + 1]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if adj_targets[mid] < v:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < adj_offsets[u_arr[i] + 1] and adj_targets[lo] == v:
+            slots[i] = lo
+    return slots
+
+
+@njit(cache=True)
+def dijkstra_all(adj_offsets, adj_targets, adj_weights, src):
+    """Shortest distance in meters from src to every node (inf if unreachable)."""
+    n = adj_offsets.shape[0] - 1
+    dist = np.full(n, np.inf)
+    dist[src] = 0.0
+    open_set = [(0.0, np.int64(src))]
+    while len(open_set) > 0:
+        d, current = heapq.heappop(open_set)
+        if d > dist[current]:
+            continue
+        for j in range(adj_offsets[current], adj_offsets[current + 1]):
+            neighbor = np.int64(adj_targets[j])
+            new_d = d + np.float64(adj_weights[j])
+            if new_d < dist[neighbor]:
+                dist[neighbor] = new_d
+                heapq.heappush(open_set, (new_d, neighbor))
+    return dist
@@ -3,10 +3,14 @@
 
 import os
 import sqlite3
+from contextlib import contextmanager
 from datetime import datetime
 
 DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "walk_history.db")
 
+# Shared by the point lookups so sqlite3's statement cache prepares it once
+_WALK_COUNT_SQL = "SELECT walk_count FROM edge_history WHERE edge_start = ? AND edge_end = ?"
+
 
 def _edge_key(n1, n2):
     """Return a canonical edge key (smaller node ID first) for undirected consistency."""
@@ -18,10 +22,37 @@ class WalkHistory:
 
     def __init__(self, db_path=DEFAULT_DB):
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        self.conn = sqlite3.connect(db_path)
+        # Autocommit mode: reads run without the implicit BEGIN the DB-API
+        # would otherwise issue, and writes open their own transaction
+        self.conn = sqlite3.connect(db_path, isolation_level=None)
+        # get_walked_edges() result, dropped whenever record_walk writes
+        self._walked = None
         self._init_db()
 
+    @contextmanager
+    def _transaction(self):
+        """Run the enclosed statements in one explicit write transaction.
+
+        IMMEDIATE takes the write lock up front, so a concurrent writer
+        makes BEGIN wait (or fail) rather than the first write midway.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
     def _init_db(self):
+        # WAL + NORMAL sync: commits append to the log instead of rewriting
+        # pages and fsyncing twice, which dominates small record_walk calls
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self._transaction():
+            self._create_schema()
+
+    def _create_schema(self):
         self.conn.execute("""
             CREATE TABLE IF NOT EXISTS edge_history (
                 edge_start INTEGER NOT NULL,
@@ -31,7 +62,45 @@ class WalkHistory:
                 PRIMARY KEY (edge_start, edge_end)
             )
         """)
-        self.conn.commit()
+        # Single-row running totals so stats() needn't scan edge_history.
+        # The triggers keep it in step with every insert/upsert; a database
+        # created before this table existed is backfilled once from a scan.
+        # first/last walk come from the last_walked index instead, since
+        # re-walking an edge can move the minimum.
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS edge_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                total_edges INTEGER NOT NULL,
+                total_walks INTEGER NOT NULL,
+                max_walks INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            INSERT OR IGNORE INTO edge_stats
+            SELECT 0, COUNT(*), COALESCE(SUM(walk_count), 0), COALESCE(MAX(walk_count), 0)
+            FROM edge_history
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS edge_history_last_walked ON edge_history (last_walked)")
+        self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS edge_history_insert AFTER INSERT ON edge_history
+            BEGIN
+                UPDATE edge_stats SET
+                    total_edges = total_edges + 1,
+                    total_walks = total_walks + NEW.walk_count,
+                    max_walks = MAX(max_walks, NEW.walk_count)
+                WHERE id = 0;
+            END
+        """)
+        self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS edge_history_update AFTER UPDATE ON edge_history
+            BEGIN
+                UPDATE edge_stats SET
+                    total_walks = total_walks + NEW.walk_count - OLD.walk_count,
+                    max_walks = MAX(max_walks, NEW.walk_count)
+                WHERE id = 0;
+            END
+        """)
 
     def record_walk(self, route_edges):
         """Record a list of edges as walked.
@@ -39,62 +108,67 @@ class WalkHistory:
         Args:
             route_edges: List of (node_a, node_b) tuples
         """
+        self.record_walks([route_edges])
+
+    def record_walks(self, routes):
+        """Record several routes as walked, in one transaction.
+
+        Same result as calling record_walk for each route in turn.
+
+        Args:
+            routes: Iterable of edge lists, as taken by record_walk
+        """
         now = datetime.now().isoformat()
-        for n1, n2 in route_edges:
-            start, end = _edge_key(n1, n2)
-            self.conn.execute("""
+        # Fed to executemany as a generator, so the rows are never all
+        # held in memory at once
+        rows = ((*_edge_key(n1, n2), now) for route_edges in routes for n1, n2 in route_edges)
+        self._walked = None
+        # One prepared statement for every row, in a single transaction
+        with self._transaction():
+            self.conn.executemany("""
                 INSERT INTO edge_history (edge_start, edge_end, walk_count, last_walked)
                 VALUES (?, ?, 1, ?)
                 ON CONFLICT(edge_start, edge_end)
-                DO UPDATE SET walk_count = walk_count + 1, last_walked = ?
-            """, (start, end, now, now))
-        self.conn.commit()
+                DO UPDATE SET walk_count = walk_count + 1, last_walked = excluded.last_walked
+            """, rows)
 
     def get_walked_edges(self):
-        """Return set of all walked edge keys."""
-        cursor = self.conn.execute("SELECT edge_start, edge_end FROM edge_history")
-        return {(row[0], row[1]) for row in cursor}
+        """Return set of all walked edge keys.
+
+        The set is cached until the next record_walk, so it is returned
+        as a frozenset.
+        """
+        if self._walked is None:
+            cursor = self.conn.execute("SELECT edge_start, edge_end FROM edge_history")
+            self._walked = frozenset(cursor)
+        return self._walked
 
     def is_walked(self, n1, n2):
         """Check if a specific edge has been walked."""
-        start, end = _edge_key(n1, n2)
-        cursor = self.conn.execute(
-            "SELECT walk_count FROM edge_history WHERE edge_start = ? AND edge_end = ?",
-            (start, end),
-        )
-        row = cursor.fetchone()
+        row = self.conn.execute(_WALK_COUNT_SQL, _edge_key(n1, n2)).fetchone()
         return row is not None
 
     def get_walk_count(self, n1, n2):
         """Get the number of times an edge has been walked."""
-        start, end = _edge_key(n1, n2)
-        cursor = self.conn.execute(
-            "SELECT walk_count FROM edge_history WHERE edge_start = ? AND edge_end = ?",
-            (start, end),
-        )
-        row = cursor.fetchone()
+        row = self.conn.execute(_WALK_COUNT_SQL, _edge_key(n1, n2)).fetchone()
         return row[0] if row else 0
 
     def stats(self):
         """Return summary statistics about walk history."""
         cursor = self.conn.execute("""
-            SELECT
-                COUNT(*) as total_edges,
-                SUM(walk_count) as total_walks,
-                AVG(walk_count) as avg_walks_per_edge,
-                MAX(walk_count) as max_walks,
-                MIN(last_walked) as first_walk,
-                MAX(last_walked) as last_walk
-            FROM edge_history
+            SELECT total_edges, total_walks, max_walks,
+                   (SELECT MIN(last_walked) FROM edge_history),
+                   (SELECT MAX(last_walked) FROM edge_history)
+            FROM edge_stats WHERE id = 0
         """)
-        row = cursor.fetchone()
+        total_edges, total_walks, max_walks, first_walk, last_walk = cursor.fetchone()
         return {
-            "unique_edges_walked": row[0],
-            "total_edge_traversals": row[1] or 0,
-            "avg_walks_per_edge": round(row[2], 2) if row[2] else 0,
-            "max_walks_single_edge": row[3] or 0,
-            "first_walk": row[4],
-            "last_walk": row[5],
+            "unique_edges_walked": total_edges,
+            "total_edge_traversals": total_walks,
+            "avg_walks_per_edge": round(total_walks / total_edges, 2) if total_edges else 0,
+            "max_walks_single_edge": max_walks,
+            "first_walk": first_walk,
+            "last_walk": last_walk,
         }
 
     def close(self):
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""SQLite-backed memoization of routing results across CLI invocations."""
+
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+
+from router import shortest_path, novelty_route, path_to_edges
+
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "route_cache.sqlite")
+
+
+def _graph_signature(G):
+    """Identifier for the graph a result was computed on.
+
+    For a graph loaded from disk this includes the file's size and mtime,
+    so rebuilding it (even to identical node/edge counts) orphans earlier
+    entries. Graphs built in memory are identified by a digest of their
+    arrays instead.
+    """
+    graph_path = G.graph_path
+    if graph_path and os.path.exists(graph_path):
+        st = os.stat(graph_path)
+        return f"{G.number_of_nodes()}:{G.number_of_edges()}:{st.st_size}:{st.st_mtime_ns}"
+    digest = hashlib.sha1()
+    for arr in (G.node_ids, G.adj_offsets, G.adj_targets, G.adj_weights):
+        digest.update(np.ascontiguousarray(arr).tobytes())
+    return digest.hexdigest()
+
+
+def _walked_digest(walked_edges):
+    """Stable digest of a walked-edge set (independent of set iteration order)."""
+    if not walked_edges:
+        return ""
+    keys = np.array(sorted(walked_edges), dtype=np.int64)
+    return hashlib.sha1(keys.tobytes()).hexdigest()
+
+
+class RouteCache:
+    """Persist shortest-path and novelty-route results keyed by their inputs."""
+
+    def __init__(self, db_path=DEFAULT_DB):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self._init_db()
+
+    def _init_db(self):
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS route_cache (
+                cache_key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created TEXT NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def _get(self, key):
+        cursor = self.conn.execute(
+            "SELECT result FROM route_cache WHERE cache_key = ?", (key,))
+        row = cursor.fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _put(self, key, value):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO route_cache (cache_key, result, created) VALUES (?, ?, ?)",
+            (key, json.dumps(value), datetime.now().isoformat()),
+        )
+        self.conn.commit()
+
+    def shortest_path(self, G, source, target, max_radius=None):
+        """Cached router.shortest_path. Returns (path, distance) or (None, None).
+
+        max_radius only prunes the search, so it is not part of the key.
+        """
+        key = json.dumps(["shortest", _graph_signature(G), source, target])
+        hit = self._get(key)
+        if hit is not None:
+            return hit["path"], hit["distance"]
+
+        path, dist = shortest_path(G, source, target, max_radius=max_radius)
+        if path is not None:
+            self._put(key, {"path": path, "distance": dist})
+        return path, dist
+
+    def novelty_route(self, G, source, target, walked_edges, min_novelty=0.3, max_overhead=0.25,
+                      max_radius=None):
+        """Cached router.novelty_route. Returns the result dict or None."""
+        key = json.dumps(["novelty", _graph_signature(G), source, target,
+                          _walked_digest(walked_edges), min_novelty, max_overhead])
+        hit = self._get(key)
+        if hit is not None:
+            hit["edges"] = path_to_edges(hit["path"])
+            return hit
+
+        result = novelty_route(G, source, target, walked_edges,
+                               min_novelty=min_novelty, max_overhead=max_overhead,
+                               max_radius=max_radius)
+        if result is not None:
+            # Edges are derived from the path, so don't store them twice
+            self._put(key, {k: v for k, v in result.items() if k != "edges"})
+        return result
+
+    def clear(self):
+        """Drop all cached routes."""
+        self.conn.execute("DELETE FROM route_cache")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
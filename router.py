@@ -1,57 +1,79 @@
 #!/usr/bin/env python3
 """Shortest path and novelty-weighted pedestrian routing.
 
-Uses parent-pointer A* with int32 array indices for O(V) memory
-instead of O(V^2) path copies in every queue entry.
+Uses parent-pointer A* over array indices for O(V) memory instead of
+O(V^2) path copies in every queue entry. Searches can be bounded by a
+max_radius (meters): any node whose best-case route length g + h exceeds
+it is never expanded. Both searches run as Numba-compiled kernels
+(router_numba) directly on the graph's CSR arrays.
 """
 
-import heapq
 import math
+import weakref
+from collections import OrderedDict
+from itertools import chain, groupby
 
 import numpy as np
 
-from graph_builder import haversine, bearing
+from graph_builder import bearing_v, haversine_v
+from router_numba import astar_csr, penalized_astar_csr
 
+# Search results per graph, {G: OrderedDict(key -> (path, distance))}, so
+# repeated novelty_route calls skip searches they have already run. Weakly
+# keyed: a discarded graph takes its entries with it.
+_SEARCH_MEMO = weakref.WeakKeyDictionary()
+_SEARCH_MEMO_SIZE = 256
 
-def _heuristic_idx(G, idx, target_lat, target_lon):
-    """A* heuristic: straight-line distance from node index to target coords."""
-    return haversine(float(G.node_lats[idx]), float(G.node_lons[idx]),
-                     target_lat, target_lon)
 
+def _memoized_search(G, key, search):
+    """Return search() for key, reusing a stored result when there is one."""
+    memo = _SEARCH_MEMO.get(G)
+    if memo is None:
+        memo = _SEARCH_MEMO[G] = OrderedDict()
+    if key in memo:
+        memo.move_to_end(key)
+    else:
+        memo[key] = search()
+        if len(memo) > _SEARCH_MEMO_SIZE:
+            memo.popitem(last=False)
+    path, dist = memo[key]
+    # Callers own the returned list
+    return (list(path) if path is not None else None), dist
 
-def _reconstruct_path(came_from, src_idx, tgt_idx):
-    """Walk parent pointers from target back to source. Returns list of indices."""
-    path = []
-    cur = tgt_idx
-    while cur != -1:
-        path.append(cur)
-        if cur == src_idx:
-            break
-        cur = int(came_from[cur])
-    path.reverse()
-    return path
+
+# Scratch arrays for the search kernels per graph, {G: (g_score, g_actual,
+# came_from, h_cache, touched)}. The kernels reset the entries they touch
+# before returning, so one set of num_nodes-sized arrays serves every search
+# instead of being allocated and filled for each of them.
+_SEARCH_BUFFERS = weakref.WeakKeyDictionary()
 
 
-def _path_distance(G, path_indices):
-    """Sum edge weights along a path of node indices."""
-    total = 0.0
-    for i in range(len(path_indices) - 1):
-        u = path_indices[i]
-        targets, weights = G.neighbors(u)
-        v = path_indices[i + 1]
-        # Find the edge to v
-        mask = targets == v
-        total += float(weights[mask][0])
-    return total
+def _search_buffers(G):
+    """Return the kernel scratch arrays for G, allocating them on first use."""
+    buffers = _SEARCH_BUFFERS.get(G)
+    if buffers is None:
+        n = G.number_of_nodes()
+        buffers = _SEARCH_BUFFERS[G] = (
+            np.full(n, np.inf),
+            np.full(n, np.inf),
+            np.full(n, -1, dtype=np.int64),
+            np.full(n, -1.0),
+            np.empty(n, dtype=np.int64),
+        )
+    return buffers
 
 
-def shortest_path(G, source_osm, target_osm):
-    """Find shortest path using A* with haversine heuristic.
+def shortest_path(G, source_osm, target_osm, max_radius=None):
+    """Find shortest path using A* with a haversine + landmark heuristic.
+
+    The search itself runs in the compiled router_numba.astar_csr kernel.
 
     Args:
         G: CompactGraph
         source_osm: Source node OSM ID
         target_osm: Target node OSM ID
+        max_radius: Optional upper bound in meters on the route length;
+            nodes that cannot lie on a route within it are not explored
 
     Returns:
         (path, distance) where path is a list of OSM node IDs and distance is in meters.
@@ -62,48 +84,22 @@ def shortest_path(G, source_osm, target_osm):
 
     src_idx = G.idx_for_osm_id(source_osm)
     tgt_idx = G.idx_for_osm_id(target_osm)
+    bound = math.inf if max_radius is None else max_radius
 
-    target_lat = float(G.node_lats[tgt_idx])
-    target_lon = float(G.node_lons[tgt_idx])
-    num_nodes = G.number_of_nodes()
-
-    came_from = np.full(num_nodes, -1, dtype=np.int32)
-    g_score = np.full(num_nodes, np.inf, dtype=np.float64)
-    g_score[src_idx] = 0.0
-
-    counter = 0
-    # Priority queue: (f_score, g_score, counter, node_idx)
-    open_set = [(0.0, 0.0, counter, src_idx)]
-
-    while open_set:
-        f, g, _, current = heapq.heappop(open_set)
-
-        if current == tgt_idx:
-            path_indices = _reconstruct_path(came_from, src_idx, tgt_idx)
-            path_osm = [int(G.node_ids[i]) for i in path_indices]
-            return path_osm, g
-
-        if g > g_score[current]:
-            continue
-
-        targets, weights = G.neighbors(current)
-        for j in range(len(targets)):
-            neighbor = int(targets[j])
-            new_g = g + float(weights[j])
-
-            if new_g < g_score[neighbor]:
-                g_score[neighbor] = new_g
-                came_from[neighbor] = current
-                h = _heuristic_idx(G, neighbor, target_lat, target_lon)
-                counter += 1
-                heapq.heappush(open_set, (new_g + h, new_g, counter, neighbor))
-
-    return None, None
+    path_indices, dist = astar_csr(G.adj_offsets, G.adj_targets, G.adj_weights,
+                                   G.node_lats, G.node_lons, G.landmarks,
+                                   src_idx, tgt_idx, bound,
+                                   *_search_buffers(G))
+    if len(path_indices) == 0:
+        return None, None
+    return G.node_ids[path_indices].tolist(), float(dist)
 
 
 def path_to_edges(path):
-    """Convert a node path to a list of edge tuples (OSM IDs)."""
-    return [(path[i], path[i + 1]) for i in range(len(path) - 1)]
+    """Convert a node path (list or NumPy array of OSM IDs) to a list of edge tuples."""
+    if isinstance(path, np.ndarray):
+        path = path.tolist()
+    return list(zip(path, path[1:]))
 
 
 def _edge_key(n1, n2):
@@ -111,7 +107,8 @@ def _edge_key(n1, n2):
     return (min(n1, n2), max(n1, n2))
 
 
-def novelty_route(G, source, target, walked_edges, min_novelty=0.3, max_overhead=0.25):
+def novelty_route(G, source, target, walked_edges, min_novelty=0.3, max_overhead=0.25,
+                  max_radius=None):
     """Find a route that maximizes novel (unwalked) edges.
 
     Args:
@@ -121,38 +118,62 @@ def novelty_route(G, source, target, walked_edges, min_novelty=0.3, max_overhead
         walked_edges: Set of (min_node, max_node) edge keys that have been walked
         min_novelty: Minimum fraction of edges that should be novel (0.0 - 1.0)
         max_overhead: Maximum allowed overhead vs shortest path (0.0 - 1.0)
+        max_radius: Optional bound in meters for the baseline shortest path
+            search (see shortest_path)
 
     Returns:
         dict with keys: path, distance, novelty, overhead, shortest_distance, edges
     """
-    # Phase 1: Get baseline shortest path
-    base_path, base_dist = shortest_path(G, source, target)
+    # Phase 1: Get baseline shortest path (independent of walked_edges)
+    base_path, base_dist = _memoized_search(
+        G, ("shortest", source, target, max_radius),
+        lambda: shortest_path(G, source, target, max_radius=max_radius))
     if base_path is None:
         return None
 
-    base_edges = path_to_edges(base_path)
-    base_novel = _compute_novelty(base_edges, walked_edges)
+    # Walked edges as sorted packed keys, shared by every novelty count
+    # and penalized search below
+    walked_keys = _walked_keys(G, walked_edges)
+    base_novel = _compute_novelty(G, base_path, walked_keys)
 
     if base_novel >= min_novelty:
-        return _build_result(base_path, base_dist, base_dist, walked_edges, G)
+        return _build_result(base_path, base_dist, base_dist, walked_keys, G)
 
     if not walked_edges:
-        return _build_result(base_path, base_dist, base_dist, walked_edges, G)
-
-    # Phase 2: Iterative penalty search
-    best_result = None
+        return _build_result(base_path, base_dist, base_dist, walked_keys, G)
+
+    # Phase 2: Iterative penalty search. Results are memoized on the exact
+    # inputs, so penalties retried here or by later calls with the same
+    # walked set cost nothing.
+    walked_digest = walked_keys.tobytes()
+    # Built once here and shared by every penalized search below
+    walked_mask = _walked_mask(G, walked_keys)
+
+    # Path found at each penalty tried while bracketing/bisecting below
+    searched = {}
+
+    def search(penalty):
+        path, dist = _memoized_search(
+            G, ("penalized", source, target, walked_digest, penalty),
+            lambda: _penalized_astar(G, source, target, walked_mask, penalty))
+        searched[penalty] = path
+        return path, dist
+
+    # Best candidate so far; only it is turned into a result (edges,
+    # instructions) once the search is over
+    best_path = None
+    best_dist = None
     best_novelty = base_novel
 
     lo_penalty = 1.0
     hi_penalty = 10.0
 
     for _ in range(5):
-        path, dist = _penalized_astar(G, source, target, walked_edges, hi_penalty)
+        path, dist = search(hi_penalty)
         if path is None:
             hi_penalty = (lo_penalty + hi_penalty) / 2
             continue
-        edges = path_to_edges(path)
-        novelty = _compute_novelty(edges, walked_edges)
+        novelty = _compute_novelty(G, path, walked_keys)
         if novelty >= min_novelty:
             break
         hi_penalty *= 2
@@ -160,20 +181,25 @@ def novelty_route(G, source, target, walked_edges, min_novelty=0.3, max_overhead
             break
 
     for _ in range(10):
+        # A path's penalized cost is linear in the penalty, so if both ends
+        # of the bracket found the same path, every penalty between them
+        # does too and the remaining steps would only repeat it
+        lo_path = searched.get(lo_penalty)
+        if lo_path is not None and lo_path == searched.get(hi_penalty):
+            break
+
         mid_penalty = (lo_penalty + hi_penalty) / 2
-        path, dist = _penalized_astar(G, source, target, walked_edges, mid_penalty)
+        path, dist = search(mid_penalty)
 
         if path is None:
             hi_penalty = mid_penalty
             continue
 
-        edges = path_to_edges(path)
-        novelty = _compute_novelty(edges, walked_edges)
+        novelty = _compute_novelty(G, path, walked_keys)
         overhead = (dist - base_dist) / base_dist if base_dist > 0 else 0
 
         if overhead <= max_overhead and novelty > best_novelty:
-            best_novelty = novelty
-            best_result = _build_result(path, dist, base_dist, walked_edges, G)
+            best_path, best_dist, best_novelty = path, dist, novelty
 
         if novelty < min_novelty:
             lo_penalty = mid_penalty
@@ -182,94 +208,91 @@ def novelty_route(G, source, target, walked_edges, min_novelty=0.3, max_overhead
         else:
             lo_penalty = mid_penalty
 
-    if best_result is None or best_result["novelty"] < min_novelty:
+    if best_path is None or best_novelty < min_novelty:
         for penalty in [1.5, 2.0, 3.0, 5.0, 8.0]:
-            path, dist = _penalized_astar(G, source, target, walked_edges, penalty)
+            path, dist = search(penalty)
             if path is None:
                 continue
-            edges = path_to_edges(path)
-            novelty = _compute_novelty(edges, walked_edges)
+            novelty = _compute_novelty(G, path, walked_keys)
             overhead = (dist - base_dist) / base_dist if base_dist > 0 else 0
 
             if overhead <= max_overhead and novelty > best_novelty:
-                best_novelty = novelty
-                best_result = _build_result(path, dist, base_dist, walked_edges, G)
-
-    if best_result is None:
-        best_result = _build_result(base_path, base_dist, base_dist, walked_edges, G)
-
-    return best_result
+                best_path, best_dist, best_novelty = path, dist, novelty
 
+    if best_path is None:
+        return _build_result(base_path, base_dist, base_dist, walked_keys, G)
 
-def _penalized_astar(G, source_osm, target_osm, walked_edges, penalty_factor):
-    """A* search with penalty on walked edges. Uses parent pointers."""
-    if source_osm == target_osm:
-        return [source_osm], 0.0
+    return _build_result(best_path, best_dist, base_dist, walked_keys, G)
 
-    src_idx = G.idx_for_osm_id(source_osm)
-    tgt_idx = G.idx_for_osm_id(target_osm)
 
-    target_lat = float(G.node_lats[tgt_idx])
-    target_lon = float(G.node_lons[tgt_idx])
-    num_nodes = G.number_of_nodes()
+def _walked_keys(G, walked_edges):
+    """Pack a set of walked (osm_a, osm_b) edges into sorted int64 keys.
 
-    came_from = np.full(num_nodes, -1, dtype=np.int32)
-    g_score = np.full(num_nodes, np.inf, dtype=np.float64)
-    g_score[src_idx] = 0.0
+    Each key is (lo << 32) | hi over the endpoints' graph indices, which
+    fit in 31 bits (OSM IDs themselves do not fit in 32). Walked edges
+    with an endpoint off this graph, e.g. outside the bbox, are dropped.
+    """
+    ids = np.fromiter(chain.from_iterable(walked_edges), dtype=np.int64,
+                      count=2 * len(walked_edges))
+    idx = G.idx_for_osm_ids_bulk(ids).reshape(-1, 2)
+    idx = idx[(idx >= 0).all(axis=1)]
+    return np.unique(_pack_edge_keys(idx[:, 0], idx[:, 1]))
 
-    counter = 0
-    open_set = [(0.0, 0.0, counter, src_idx)]
 
-    while open_set:
-        f, g, _, current = heapq.heappop(open_set)
+def _pack_edge_keys(u, v):
+    """(lo << 32) | hi for each edge (u[i], v[i]) of graph indices."""
+    return (np.minimum(u, v) << 32) | np.maximum(u, v)
 
-        if current == tgt_idx:
-            # Reconstruct path and compute actual (unpenalized) distance
-            path_indices = _reconstruct_path(came_from, src_idx, tgt_idx)
-            path_osm = [int(G.node_ids[i]) for i in path_indices]
-            actual_dist = _path_distance(G, path_indices)
-            return path_osm, actual_dist
 
-        if g > g_score[current]:
-            continue
+def _walked_mask(G, walked_keys):
+    """Boolean per CSR edge slot: True where the edge (either direction) is walked."""
+    mask = np.zeros(len(G.adj_targets), dtype=np.bool_)
+    u = walked_keys >> 32
+    v = walked_keys & 0xFFFFFFFF
+    slots = np.concatenate([G.edge_slots_bulk(u, v), G.edge_slots_bulk(v, u)])
+    mask[slots[slots >= 0]] = True
+    return mask
 
-        current_osm = int(G.node_ids[current])
-        targets, weights = G.neighbors(current)
-        for j in range(len(targets)):
-            neighbor = int(targets[j])
-            edge_weight = float(weights[j])
 
-            # Apply penalty to walked edges (using OSM IDs)
-            neighbor_osm = int(G.node_ids[neighbor])
-            ek = _edge_key(current_osm, neighbor_osm)
-            effective_weight = edge_weight
-            if ek in walked_edges:
-                effective_weight *= penalty_factor
+def _penalized_astar(G, source_osm, target_osm, walked_mask, penalty_factor, max_radius=None):
+    """A* search with penalty on walked edges (walked_mask from _walked_mask).
 
-            new_g = g + effective_weight
+    max_radius bounds the actual (unpenalized) route length in meters: a
+    node is not relaxed if its actual distance so far plus the heuristic
+    exceeds it. The search runs in the compiled
+    router_numba.penalized_astar_csr kernel over a per-slot walked mask.
+    """
+    if source_osm == target_osm:
+        return [source_osm], 0.0
 
-            if new_g < g_score[neighbor]:
-                g_score[neighbor] = new_g
-                came_from[neighbor] = current
-                h = _heuristic_idx(G, neighbor, target_lat, target_lon)
-                counter += 1
-                heapq.heappush(open_set, (new_g + h, new_g, counter, neighbor))
+    src_idx = G.idx_for_osm_id(source_osm)
+    tgt_idx = G.idx_for_osm_id(target_osm)
+    bound = math.inf if max_radius is None else max_radius
 
-    return None, None
+    path_indices, actual_dist = penalized_astar_csr(
+        G.adj_offsets, G.adj_targets, G.adj_weights, G.node_lats, G.node_lons, G.landmarks,
+        walked_mask, float(penalty_factor), src_idx, tgt_idx, bound, *_search_buffers(G))
+    if len(path_indices) == 0:
+        return None, None
+    return G.node_ids[path_indices].tolist(), float(actual_dist)
 
 
-def _compute_novelty(edges, walked_edges):
-    """Compute fraction of edges that are novel (not walked)."""
-    if not edges:
+def _compute_novelty(G, path, walked_keys):
+    """Compute fraction of the path's edges that are novel (not in walked_keys)."""
+    if len(path) < 2 or len(walked_keys) == 0:
         return 1.0
-    novel = sum(1 for e in edges if _edge_key(*e) not in walked_edges)
-    return novel / len(edges)
+    idx = G.idx_for_osm_ids_bulk(path)
+    keys = _pack_edge_keys(idx[:-1], idx[1:])
+    # walked_keys is sorted and unique, so a binary search finds each key
+    pos = np.minimum(np.searchsorted(walked_keys, keys), len(walked_keys) - 1)
+    novel = np.count_nonzero(walked_keys[pos] != keys)
+    return int(novel) / len(keys)
 
 
-def _build_result(path, distance, base_distance, walked_edges, G=None):
+def _build_result(path, distance, base_distance, walked_keys, G):
     """Build a route result dictionary."""
     edges = path_to_edges(path)
-    novelty = _compute_novelty(edges, walked_edges)
+    novelty = _compute_novelty(G, path, walked_keys)
     overhead = (distance - base_distance) / base_distance if base_distance > 0 else 0
 
     result = {
@@ -281,7 +304,7 @@ def _build_result(path, distance, base_distance, walked_edges, G=None):
         "overhead": overhead,
     }
 
-    if G is not None and G.has_name_data():
+    if G.has_name_data():
         result["instructions"] = generate_instructions(path, G)
 
     return result
@@ -309,27 +332,32 @@ _HIGHWAY_DESCRIPTIONS = {
 }
 
 
-def _compass_direction(bearing_deg):
-    """Convert bearing in degrees to compass direction string."""
-    dirs = ["north", "northeast", "east", "southeast",
-            "south", "southwest", "west", "northwest"]
-    idx = int((bearing_deg + 22.5) % 360 / 45) % 8
-    return dirs[idx]
-
-
-def _classify_turn(angle):
-    """Classify turn from signed angle (negative=left, positive=right)."""
-    abs_angle = abs(angle)
-    if abs_angle < 15:
-        return "straight"
-    elif abs_angle < 45:
-        return "slight_left" if angle < 0 else "slight_right"
-    elif abs_angle < 120:
-        return "left" if angle < 0 else "right"
-    elif abs_angle < 160:
-        return "sharp_left" if angle < 0 else "sharp_right"
-    else:
-        return "u_turn"
+_COMPASS_DIRECTIONS = ["north", "northeast", "east", "southeast",
+                       "south", "southwest", "west", "northwest"]
+
+# Turn classes by np.digitize bin of |angle| over _TURN_BINS, as
+# (right, left) pairs indexed by whether the angle is negative
+_TURN_BINS = [15, 45, 120, 160]
+_TURN_CLASSES = [
+    ("straight", "straight"),
+    ("slight_right", "slight_left"),
+    ("right", "left"),
+    ("sharp_right", "sharp_left"),
+    ("u_turn", "u_turn"),
+]
+
+
+def _compass_directions(bearings):
+    """Convert an array of bearings in degrees to compass direction strings."""
+    idx = np.trunc((np.asarray(bearings, dtype=np.float64) + 22.5) % 360 / 45)
+    return [_COMPASS_DIRECTIONS[i] for i in (idx.astype(np.int64) % 8).tolist()]
+
+
+def _classify_turns(angles):
+    """Classify turns from an array of signed angles (negative=left, positive=right)."""
+    angles = np.asarray(angles, dtype=np.float64)
+    bins = np.digitize(np.abs(angles), _TURN_BINS)
+    return [_TURN_CLASSES[b][left] for b, left in zip(bins.tolist(), (angles < 0).tolist())]
 
 
 _TURN_PREFIXES = {
@@ -362,61 +390,48 @@ def generate_instructions(path, G):
         return None
 
     # Convert to indices
-    indices = [G.idx_for_osm_id(osm_id) for osm_id in path]
-
-    # For each edge: compute bearing, look up name/highway, compute distance
-    edges = []
-    for i in range(len(indices) - 1):
-        u_idx = indices[i]
-        v_idx = indices[i + 1]
-
-        lat1 = float(G.node_lats[u_idx])
-        lon1 = float(G.node_lons[u_idx])
-        lat2 = float(G.node_lats[v_idx])
-        lon2 = float(G.node_lons[v_idx])
-
-        b = bearing(lat1, lon1, lat2, lon2)
-        d = haversine(lat1, lon1, lat2, lon2)
-
-        name = G.edge_name(u_idx, v_idx)
-        highway = G.edge_highway(u_idx, v_idx)
-
-        # Effective name: street name if present, else fallback
-        if name:
-            effective_name = name
-        elif highway:
-            effective_name = _HIGHWAY_DESCRIPTIONS.get(highway, "road")
-        else:
-            effective_name = "road"
+    indices = G.idx_for_osm_ids_bulk(path)
 
-        edges.append({
-            "bearing": b, "distance": d, "name": name,
-            "highway": highway, "effective_name": effective_name,
-            "start_idx": i,
-        })
+    # Street names and highway types for the whole path in one lookup each
+    names = G.edge_names_bulk(indices[:-1], indices[1:])
+    highways = G.edge_highways_bulk(indices[:-1], indices[1:])
 
-    if not edges:
-        return None
+    # Bearings and distances for every edge of the path at once
+    lats = G.node_lats[indices].astype(np.float64)
+    lons = G.node_lons[indices].astype(np.float64)
+    bearings = bearing_v(lats[:-1], lons[:-1], lats[1:], lons[1:]).tolist()
+    dists = haversine_v(lats[:-1], lons[:-1], lats[1:], lons[1:]).tolist()
+
+    # Effective name: street name if present, else a description of the
+    # highway type
+    effective_names = [
+        name or _HIGHWAY_DESCRIPTIONS.get(highway, "road")
+        for name, highway in zip(names, highways)
+    ]
 
     # Group consecutive edges with the same effective name
     groups = []
-    group_start = 0
-    while group_start < len(edges):
-        group_end = group_start + 1
-        while (group_end < len(edges) and
-               edges[group_end]["effective_name"] == edges[group_start]["effective_name"]):
-            group_end += 1
-
-        total_dist = sum(edges[j]["distance"] for j in range(group_start, group_end))
+    for effective_name, run in groupby(range(len(effective_names)), key=effective_names.__getitem__):
+        run = list(run)
+        first, last = run[0], run[-1]
         groups.append({
-            "effective_name": edges[group_start]["effective_name"],
-            "street_name": edges[group_start]["name"],
-            "total_distance": total_dist,
-            "entry_bearing": edges[group_start]["bearing"],
-            "exit_bearing": edges[group_end - 1]["bearing"],
-            "start_idx": edges[group_start]["start_idx"],
+            "effective_name": effective_name,
+            "street_name": names[first],
+            "total_distance": sum(dists[first:last + 1]),
+            "entry_bearing": bearings[first],
+            "exit_bearing": bearings[last],
+            "start_idx": first,
         })
-        group_start = group_end
+
+    # Turn angle at every group boundary: this group's entry bearing minus
+    # the previous group's exit bearing, normalized to [-180, 180]. Both
+    # bearings are in [0, 360), so a single wrap is enough.
+    entry_bearings = np.array([g["entry_bearing"] for g in groups])
+    exit_bearings = np.array([g["exit_bearing"] for g in groups])
+    angles = entry_bearings[1:] - exit_bearings[:-1]
+    angles = np.where(angles > 180, angles - 360, np.where(angles < -180, angles + 360, angles))
+    turn_directions = _classify_turns(angles)
+    turn_angles = angles.tolist()
 
     # Generate instructions
     steps = []
@@ -426,22 +441,13 @@ def generate_instructions(path, G):
         lon = float(G.node_lons[node_idx])
 
         if i == 0:
-            compass = _compass_direction(group["entry_bearing"])
+            compass = _compass_directions(entry_bearings[:1])[0]
             instruction = f"Head {compass} on {group['effective_name']}"
             turn_direction = "start"
             turn_angle = 0.0
         else:
-            prev_exit = groups[i - 1]["exit_bearing"]
-            this_entry = group["entry_bearing"]
-            angle = this_entry - prev_exit
-            # Normalize to [-180, 180]
-            while angle > 180:
-                angle -= 360
-            while angle < -180:
-                angle += 360
-
-            turn_angle = angle
-            turn_direction = _classify_turn(angle)
+            turn_angle = turn_angles[i - 1]
+            turn_direction = turn_directions[i - 1]
             prefix = _TURN_PREFIXES[turn_direction]
             if turn_direction == "straight":
                 instruction = f"{prefix} on {group['effective_name']}"
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""Numba-compiled search kernels used by router.
+
+They run directly on CompactGraph's CSR arrays (adj_offsets, adj_targets,
+adj_weights, node_lats, node_lons, landmarks), so calling them needs no
+conversion.
+Kept in a separate module so the JIT cache (cache=True writes next to
+this file in __pycache__) is only invalidated when a kernel changes.
+"""
+
+import heapq
+import math
+
+import numpy as np
+from numba import njit
+
+EARTH_RADIUS_M = 6371000.0
+
+
+@njit(cache=True)
+def _haversine_to(lat, lon, tgt_lat, tgt_lon, cos_tgt):
+    """graph_builder.haversine to a fixed target, compiled.
+
+    cos_tgt is cos(radians(tgt_lat)): the target is fixed for a whole
+    search, so the kernels compute it once rather than on every call.
+    """
+    phi1 = math.radians(lat)
+    dphi = math.radians(tgt_lat - lat)
+    dlam = math.radians(tgt_lon - lon)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * cos_tgt * math.sin(dlam / 2) ** 2
+    return EARTH_RADIUS_M * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+@njit(cache=True)
+def _heuristic(lats, lons, landmarks, v, tgt_lat, tgt_lon, cos_tgt, lm_tgt):
+    """Lower bound on the v→tgt distance: haversine or ALT, whichever is larger.
+
+    lm_tgt is landmarks[tgt]. Landmarks that either node cannot reach
+    say nothing about the pair and are skipped.
+    """
+    h = _haversine_to(np.float64(lats[v]), np.float64(lons[v]), tgt_lat, tgt_lon, cos_tgt)
+    for k in range(lm_tgt.shape[0]):
+        a = np.float64(lm_tgt[k])
+        b = np.float64(landmarks[v, k])
+        if a != np.inf and b != np.inf and abs(a - b) > h:
+            h = abs(a - b)
+    return h
+
+
+@njit(cache=True)
+def _trace_path(came_from, src, tgt):
+    """Follow parent pointers from tgt back to src. Returns an index array."""
+    length = 1
+    cur = tgt
+    while cur != src:
+        cur = came_from[cur]
+        length += 1
+    path = np.empty(length, dtype=np.int64)
+    cur = tgt
+    for i in range(length - 1, -1, -1):
+        path[i] = cur
+        cur = came_from[cur]
+    return path
+
+
+@njit(cache=True)
+def _clear(touched, count, g_score, g_actual, came_from, h_cache):
+    """Reset the first count nodes in touched to their unvisited values."""
+    for i in range(count):
+        node = touched[i]
+        g_score[node] = np.inf
+        g_actual[node] = np.inf
+        came_from[node] = -1
+        h_cache[node] = -1.0
+
+
+@njit(cache=True)
+def astar_csr(offsets, targets, weights, lats, lons, landmarks, src, tgt, max_r,
+              g_score, g_actual, came_from, h_cache, touched):
+    """A* over CSR arrays with a haversine + landmark (ALT) heuristic.
+
+    The queue is ordered by (f, g, push order), so ties on f go to the
+    smaller g and then to the earlier push. A neighbour is only relaxed
+    if its new g plus its heuristic stays within max_r (pass math.inf
+    for no bound); anything farther is never queued.
+
+    g_score, g_actual, came_from and h_cache are per-node scratch arrays
+    (inf, inf, -1 and -1.0 throughout), and touched has room for every
+    node. They come from router._search_buffers; only the nodes a search
+    reaches are written, and those are reset before it returns, so the
+    same arrays serve every search on the graph.
+
+    Returns:
+        (path, distance) where path is an int64 array of node indices,
+        empty if tgt is unreachable within max_r.
+    """
+    tgt_lat = np.float64(lats[tgt])
+    tgt_lon = np.float64(lons[tgt])
+    cos_tgt = math.cos(math.radians(tgt_lat))
+    lm_tgt = landmarks[tgt]
+
+    g_score[src] = 0.0
+    # Every node written below gets its heuristic first, so the touched
+    # nodes are src plus those with a cached heuristic
+    touched[0] = src
+    n_touched = 1
+    counter = 0
+    open_set = [(0.0, 0.0, np.int64(0), np.int64(src))]
+
+    while len(open_set) > 0:
+        f, g, _, current = heapq.heappop(open_set)
+
+        if current == tgt:
+            path = _trace_path(came_from, src, tgt)
+            _clear(touched, n_touched, g_score, g_actual, came_from, h_cache)
+            return path, g
+
+        if g > g_score[current]:
+            continue
+
+        for j in range(offsets[current], offsets[current + 1]):
+            neighbor = np.int64(targets[j])
+            new_g = g + np.float64(weights[j])
+
+            if new_g < g_score[neighbor]:
+                h = h_cache[neighbor]
+                if h < 0.0:
+                    h = _heuristic(lats, lons, landmarks, neighbor,
+                                   tgt_lat, tgt_lon, cos_tgt, lm_tgt)
+                    h_cache[neighbor] = h
+                    touched[n_touched] = neighbor
+                    n_touched += 1
+                if new_g + h > max_r:
+                    continue
+                g_score[neighbor] = new_g
+                came_from[neighbor] = current
+                counter += 1
+                heapq.heappush(open_set, (new_g + h, new_g, np.int64(counter), neighbor))
+
+    _clear(touched, n_touched, g_score, g_actual, came_from, h_cache)
+    return np.empty(0, dtype=np.int64), math.inf
+
+
+@njit(cache=True)
+def penalized_astar_csr(offsets, targets, weights, lats, lons, landmarks, walked_mask, penalty,
+                        src, tgt, max_r, g_score, g_actual, came_from, h_cache, touched):
+    """A* where edge slots flagged in walked_mask cost penalty x their length.
+
+    The queue is ordered by penalized (f, g, push order), with ties
+    broken as in astar_csr. max_r bounds the actual (unpenalized) length
+    so far plus the heuristic, so the penalty does not change which nodes
+    are in range. Penalties only lengthen edges, so the heuristic stays
+    admissible. The scratch arrays are used as in astar_csr.
+
+    Returns:
+        (path, actual_distance); path is empty if tgt is unreachable.
+    """
+    tgt_lat = np.float64(lats[tgt])
+    tgt_lon = np.float64(lons[tgt])
+    cos_tgt = math.cos(math.radians(tgt_lat))
+    lm_tgt = landmarks[tgt]
+
+    g_score[src] = 0.0
+    g_actual[src] = 0.0
+    touched[0] = src
+    n_touched = 1
+    counter = 0
+    open_set = [(0.0, 0.0, np.int64(0), np.int64(src))]
+
+    while len(open_set) > 0:
+        f, g, _, current = heapq.heappop(open_set)
+
+        if current == tgt:
+            path = _trace_path(came_from, src, tgt)
+            dist = g_actual[tgt]
+            _clear(touched, n_touched, g_score, g_actual, came_from, h_cache)
+            return path, dist
+
+        if g > g_score[current]:
+            continue
+
+        current_actual = g_actual[current]
+        for j in range(offsets[current], offsets[current + 1]):
+            neighbor = np.int64(targets[j])
+            edge_weight = np.float64(weights[j])
+            effective_weight = edge_weight * penalty if walked_mask[j] else edge_weight
+            new_g = g + effective_weight
+
+            if new_g < g_score[neighbor]:
+                h = h_cache[neighbor]
+                if h < 0.0:
+                    h = _heuristic(lats, lons, landmarks, neighbor,
+                                   tgt_lat, tgt_lon, cos_tgt, lm_tgt)
+                    h_cache[neighbor] = h
+                    touched[n_touched] = neighbor
+                    n_touched += 1
+                new_actual = current_actual + edge_weight
+                if new_actual + h > max_r:
+                    continue
+                g_score[neighbor] = new_g
+                g_actual[neighbor] = new_actual
+                came_from[neighbor] = current
+                counter += 1
+                heapq.heappush(open_set, (new_g + h, new_g, np.int64(counter), neighbor))
+
+    _clear(touched, n_touched, g_score, g_actual, came_from, h_cache)
+    return np.empty(0, dtype=np.int64), math.inf